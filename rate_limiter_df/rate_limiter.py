@@ -1,12 +1,235 @@
 import time
 import functools
-from collections import deque
-from typing import Callable, Optional, Dict, Any
+from array import array
+from bisect import bisect_right
+from inspect import CO_VARARGS, CO_VARKEYWORDS
+from types import FunctionType
+from typing import Callable, Optional, Dict, Any, Literal
 from threading import Lock
 
+Algorithm = Literal['sliding', 'fixed', 'gcra']
+
+# Number of lock stripes; must be a power of two
+_LOCK_STRIPES = 64
+_STRIPE_MASK = _LOCK_STRIPES - 1
+
+# Per-key acquires between checks for idle keys to evict
+_SWEEP_INTERVAL = 1024
+
+# Windows holding more timestamps than this are trimmed by binary search
+# rather than one timestamp at a time
+_BISECT_THRESHOLD = 8
+
+# Initial capacity of a sliding-window ring; rings double up to `calls` as needed
+_INITIAL_RING_SIZE = 4
+
+# Compact the ring table once a sweep leaves more than half of at least this
+# many slots free
+_COMPACT_MIN_SLOTS = 64
+
+_EMPTY_RING = array('q')
+
+def _grow_ring(buf: 'array[int]', head: int, count: int, calls: int) -> 'array[int]':
+    """
+    Return a copy of a full ring with its timestamps in order from index 0
+    and its capacity doubled, up to `calls`.
+    """
+    end = head + count
+    if end > len(buf):
+        grown = buf[head:] + buf[:end - len(buf)]
+    else:
+        grown = buf[head:end]
+    grown.frombytes(bytes(8 * (min(2 * len(buf), calls) - count)))
+    return grown
+
+class _RingTable:
+    """
+    Structure-of-arrays storage for the sliding windows of many keys.
+
+    Each key owns a slot: a ring buffer of timestamps in `bufs`, the index of
+    its oldest timestamp in `heads` and its number of live timestamps in
+    `counts`. Rings start at _INITIAL_RING_SIZE entries and double up to
+    `calls` only as a key makes calls. Slots of evicted keys drop their ring
+    and are reused, and `compact` renumbers live slots to shrink the table.
+    """
+
+    __slots__ = ('calls', 'slots', 'bufs', 'heads', 'counts', 'free', 'lock')
+
+    def __init__(self, calls: int):
+        self.calls = calls
+        self.slots: Dict[Any, int] = {}
+        self.bufs: list['array[int]'] = []
+        self.heads = array('q')
+        self.counts = array('q')
+        self.free: list[int] = []
+        # Guards slot allocation and compaction; per-slot state is guarded by
+        # the owning key's stripe lock
+        self.lock = Lock()
+
+    def allocate(self) -> int:
+        """Reserve a free slot with an empty window."""
+        buf = array('q', bytes(8 * min(self.calls, _INITIAL_RING_SIZE)))
+        with self.lock:
+            if self.free:
+                slot = self.free.pop()
+                self.bufs[slot] = buf
+                self.heads[slot] = 0
+                self.counts[slot] = 0
+            else:
+                slot = len(self.bufs)
+                self.bufs.append(buf)
+                self.heads.append(0)
+                self.counts.append(0)
+        return slot
+
+    def release(self, slots: list[int]) -> None:
+        """Free the rings of slots whose keys have been removed from `self.slots`."""
+        with self.lock:
+            for slot in slots:
+                self.bufs[slot] = _EMPTY_RING
+            self.free.extend(slots)
+
+    def wants_compaction(self) -> bool:
+        """True if most slots are free and the table is worth shrinking."""
+        return len(self.bufs) >= _COMPACT_MIN_SLOTS and 2 * len(self.free) > len(self.bufs)
+
+    def compact(self) -> None:
+        """
+        Renumber live slots contiguously and drop the free ones. The caller
+        holds every stripe lock, so no slot is in use.
+        """
+        with self.lock:
+            live = list(self.slots.items())
+            self.bufs = [self.bufs[slot] for _, slot in live]
+            self.heads = array('q', [self.heads[slot] for _, slot in live])
+            self.counts = array('q', [self.counts[slot] for _, slot in live])
+            for new_slot, (key, _) in enumerate(live):
+                self.slots[key] = new_slot
+            self.free = []
+
+def _count_expired(stamps: 'array[int]', head: int, count: int, capacity: int,
+                   cutoff: int) -> int:
+    """
+    Count the leading timestamps of a ring of `capacity` entries that are at
+    or before `cutoff`. The caller has checked that at least one is.
+
+    Timestamps are sorted, so large windows find the cutoff by binary search
+    over the (at most two) contiguous runs of the ring.
+    """
+    if count <= _BISECT_THRESHOLD:
+        expired = 1
+        while expired < count:
+            i = head + expired
+            if stamps[i - capacity if i >= capacity else i] > cutoff:
+                break
+            expired += 1
+        return expired
+
+    expired = 0
+    end = head + count
+    if end > capacity and stamps[capacity - 1] <= cutoff:
+        # The run up to the end of the ring has fully expired
+        expired = capacity - head
+        head = 0
+        end -= capacity
+    elif end > capacity:
+        end = capacity
+    return expired + bisect_right(stamps, cutoff, head, end) - head
+
+def _copy_metadata(wrapper: Callable[..., Any], func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Make `wrapper` look like `func`. Plain functions have their metadata
+    copied directly; other callables (partials, callable objects) fall back
+    to functools.update_wrapper, which tolerates missing attributes.
+    """
+    if type(func) is not FunctionType:
+        return functools.update_wrapper(wrapper, func)
+
+    wrapper.__module__ = func.__module__
+    wrapper.__name__ = func.__name__
+    wrapper.__qualname__ = func.__qualname__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__annotations__ = func.__annotations__
+    if hasattr(func, '__type_params__'):  # Python 3.12+
+        wrapper.__type_params__ = func.__type_params__  # type: ignore[attr-defined]
+    if func.__dict__:
+        wrapper.__dict__.update(func.__dict__)
+    wrapper.__wrapped__ = func  # type: ignore[attr-defined]
+    return wrapper
+
+# Compiled wrapper factories, keyed on (parameter list, forwarded arguments),
+# so functions sharing a parameter layout share one compiled factory
+_wrapper_factories: Dict[tuple[tuple[str, ...], tuple[str, ...]], Callable[..., Any]] = {}
+
+def _exact_signature_wrapper(func: Callable[..., Any], acquire: Callable[[Any], int | None],
+                             on_limited: Callable[[Any, int], None]) -> Callable[..., Any] | None:
+    """
+    Build a global-limit wrapper whose parameter list mirrors `func`'s, e.g.
+    `def wrapper(a, b, extra)` forwarding `func(a, b, extra)`, so calling it
+    binds arguments directly instead of packing them into *args/**kwargs.
+    Calls with arguments that don't fit the signature raise TypeError before
+    a slot is acquired.
+
+    Returns None when `func` isn't a plain function, takes **kwargs, has
+    default values (which the wrapper would have to snapshot, going stale if
+    `func.__defaults__` is later reassigned), or has a parameter name that
+    would clash with the generated code.
+    """
+    if type(func) is not FunctionType:
+        return None
+    if func.__defaults__ or func.__kwdefaults__:
+        return None
+
+    code = func.__code__
+    if code.co_flags & CO_VARKEYWORDS:
+        return None
+
+    posonly = code.co_posonlyargcount
+    positional = code.co_argcount
+    kwonly = code.co_kwonlyargcount
+    has_varargs = bool(code.co_flags & CO_VARARGS)
+    names = code.co_varnames[:positional + kwonly + has_varargs]
+    if any(name.startswith('_rl_') for name in names):
+        return None
+
+    params = list(names[:posonly])
+    if posonly:
+        params.append('/')
+    params.extend(names[posonly:positional])
+    forwarded = list(names[:positional])
+    if has_varargs:
+        star = '*' + names[positional + kwonly]
+        params.append(star)
+        forwarded.append(star)
+    elif kwonly:
+        params.append('*')
+    for name in names[positional:positional + kwonly]:
+        params.append(name)
+        forwarded.append(f'{name}={name}')
+
+    layout = (tuple(params), tuple(forwarded))
+    make_wrapper = _wrapper_factories.get(layout)
+    if make_wrapper is None:
+        source = (
+            f"def _rl_make_wrapper(_rl_func, _rl_acquire, _rl_on_limited):\n"
+            f"    def wrapper({', '.join(params)}):\n"
+            f"        _rl_wait = _rl_acquire(None)\n"
+            f"        if _rl_wait is not None:\n"
+            f"            _rl_on_limited(None, _rl_wait)\n"
+            f"        return _rl_func({', '.join(forwarded)})\n"
+            f"    return wrapper\n"
+        )
+        namespace: Dict[str, Any] = {}
+        exec(compile(source, '<rate limiter wrapper>', 'exec'), {}, namespace)
+        make_wrapper = _wrapper_factories[layout] = namespace['_rl_make_wrapper']
+
+    wrapper: Callable[..., Any] = make_wrapper(func, acquire, on_limited)
+    return wrapper
+
 class RateLimiter:
     """
-    A rate limiter that uses a sliding window algorithm.
+    A rate limiter that uses a sliding window algorithm by default, or a
+    fixed window or the Generic Cell Rate Algorithm (GCRA) when requested.
 
     Used via decorators to limit function call rates.
 
@@ -16,8 +239,16 @@ class RateLimiter:
             pass
     """
 
+    __slots__ = (
+        'calls', 'period', 'per_key', 'auto_retry', 'max_retries', 'algorithm',
+        'windows', 'tats', 'counters', '_acquire', '_is_idle', '_period_ns',
+        '_gbuf', '_ghead', '_gcount', '_increment_ns', '_tolerance_ns', '_tat',
+        '_window_id', '_window_count', '_global_lock', '_locks',
+        '_acquires_since_sweep', '_last_sweep', '_sweep_lock', '__weakref__',
+    )
+
     def __init__(self, calls: int = 1, period: float = 60.0, per_key: Optional[Callable[..., Any]] = None,
-                 auto_retry: bool = False, max_retries: int = 3):
+                 auto_retry: bool = False, max_retries: int = 3, algorithm: Algorithm = 'sliding'):
         """
         Initialize a rate limiter.
 
@@ -28,73 +259,442 @@ class RateLimiter:
                      for per-key rate limiting (e.g., per user ID)
             auto_retry: If True, automatically wait and retry when rate limited
             max_retries: Maximum number of retry attempts when auto_retry is enabled
+            algorithm: 'sliding' for a strict sliding window, 'fixed' to count calls
+                       in consecutive windows of `period` seconds (cheapest, but
+                       allows up to 2x `calls` across a window boundary), or
+                       'gcra' to keep a single theoretical arrival time per key
+                       (calls are spread evenly, with bursts of up to `calls`)
         """
         self.calls = calls
         self.period = period
         self.per_key = per_key
         self.auto_retry = auto_retry
         self.max_retries = max_retries
+        self.algorithm = algorithm
 
-        # Sliding window: {key: deque of call timestamps}
-        self.windows: Dict[Any, deque[float]] = {}
-        self.lock = Lock()
+        if calls < 1:
+            raise ValueError(f"calls must be at least 1, got {calls!r}")
+        # Also catches positive periods too small to represent in nanoseconds
+        if int(period * 1_000_000_000) < 1:
+            raise ValueError(f"period must be positive, got {period!r}")
+
+        # Global limits (no per_key) get dedicated state and acquire methods
+        # that skip the key hash, dict lookup and stripe selection
+        self._is_idle: Callable[[Any, int], bool]
+        if algorithm == 'sliding':
+            self._acquire = self._acquire_sliding if per_key is not None else self._acquire_sliding_global
+            self._is_idle = self._window_is_idle
+        elif algorithm == 'fixed':
+            self._acquire = self._acquire_fixed if per_key is not None else self._acquire_fixed_global
+            self._is_idle = self._counter_is_idle
+        elif algorithm == 'gcra':
+            self._acquire = self._acquire_gcra if per_key is not None else self._acquire_gcra_global
+            self._is_idle = self._tat_is_idle
+        else:
+            raise ValueError(f"Unknown algorithm: {algorithm!r}")
+
+        # All bookkeeping uses integer nanoseconds from the monotonic clock,
+        # so it is immune to wall-clock jumps and avoids float arithmetic
+        self._period_ns = int(period * 1_000_000_000)
+
+        # Sliding window: ring buffers of call timestamps for every key,
+        # allocated as keys are first seen
+        self.windows = _RingTable(calls)
+        # Sliding window global limit: one ring buffer held directly, only
+        # allocated when this limiter actually uses it and grown like a key's ring
+        sliding_global = algorithm == 'sliding' and per_key is None
+        self._gbuf = array('q', bytes(8 * min(calls, _INITIAL_RING_SIZE)) if sliding_global else b'')
+        self._ghead = 0
+        self._gcount = 0
+        # Fixed window: {key: [window number, calls made in that window]}
+        self.counters: Dict[Any, list[int]] = {}
+        # Fixed window global limit: the same pair, as attributes
+        self._window_id = 0
+        self._window_count = 0
+        # GCRA: {key: theoretical arrival time of the next call}
+        self.tats: Dict[Any, int] = {}
+        # GCRA emission interval and burst tolerance, precomputed off the hot path
+        self._increment_ns = self._period_ns // calls
+        self._tolerance_ns = self._period_ns - self._increment_ns
+        # GCRA global limit: a single TAT
+        self._tat = 0
+        self._global_lock = Lock()
+
+        # Striped locks: a key always maps to the same lock, so calls for
+        # different keys rarely contend while calls for one key stay serialized
+        self._locks = [Lock() for _ in range(_LOCK_STRIPES)]
+
+        # Idle keys are evicted every _SWEEP_INTERVAL acquires, at most once per period
+        self._acquires_since_sweep = 0
+        self._last_sweep = time.monotonic_ns()
+        self._sweep_lock = Lock()
+
+    def _window_is_idle(self, slot: int, current_time: int) -> bool:
+        """True if every timestamp in the slot's window has expired."""
+        windows = self.windows
+        count = windows.counts[slot]
+        if not count:
+            return True
+        buf = windows.bufs[slot]
+        newest = windows.heads[slot] + count - 1
+        if newest >= len(buf):
+            newest -= len(buf)
+        return buf[newest] <= current_time - self._period_ns
+
+    def _counter_is_idle(self, counter: list[int], current_time: int) -> bool:
+        """True if the counter belongs to a window that has ended."""
+        return counter[0] < current_time // self._period_ns
+
+    def _tat_is_idle(self, tat: int, current_time: int) -> bool:
+        """True if the TAT is in the past, i.e. the key is back to a full burst."""
+        return tat <= current_time
+
+    def _maybe_sweep(self) -> None:
+        """Called every _SWEEP_INTERVAL acquires; sweeps idle keys if a period has passed."""
+        self._acquires_since_sweep = 0
+        current_time = time.monotonic_ns()
+        if current_time - self._last_sweep >= self._period_ns:
+            self._last_sweep = current_time
+            self._sweep(current_time)
+
+    def _sweep(self, current_time: int) -> None:
+        """
+        Evict per-key state that has fully expired, so that limiters keyed
+        on many distinct values (e.g. user IDs) don't grow without bound.
+        Candidates are found without locking, then each stripe's lock is
+        taken once to recheck and delete its keys. Sweeps don't overlap; one
+        that is already running makes another a no-op.
+        """
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._sweep_locked(current_time)
+        finally:
+            self._sweep_lock.release()
+
+    def _sweep_locked(self, current_time: int) -> None:
+        """Body of `_sweep`, run while holding the sweep lock."""
+        sliding = self.algorithm == 'sliding'
+        states: Dict[Any, Any]
+        if sliding:
+            states = self.windows.slots
+        elif self.algorithm == 'fixed':
+            states = self.counters
+        else:
+            states = self.tats
+        is_idle = self._is_idle
+
+        idle_by_stripe: Dict[int, list[Any]] = {}
+        for key, state in list(states.items()):
+            if is_idle(state, current_time):
+                idle_by_stripe.setdefault(hash(key) & _STRIPE_MASK, []).append(key)
+
+        evicted: list[Any] = []
+        for stripe, keys in idle_by_stripe.items():
+            with self._locks[stripe]:
+                for key in keys:
+                    state = states.get(key)
+                    if state is not None and is_idle(state, current_time):
+                        del states[key]
+                        evicted.append(state)
+
+        if sliding and evicted:
+            windows = self.windows
+            windows.release(evicted)
 
-    def _get_key(self, *args: Any, **kwargs: Any) -> Any:
-        """Extract rate limiting key from function arguments."""
-        if self.per_key:
-            return self.per_key(*args, **kwargs)
-        return None  # Global rate limit
+            # Renumbering slots requires every key to be idle, so take all stripes
+            if windows.wants_compaction():
+                for lock in self._locks:
+                    lock.acquire()
+                try:
+                    windows.compact()
+                finally:
+                    for lock in self._locks:
+                        lock.release()
 
-    def _try_acquire_or_wait_time(self, key: Any) -> float | None:
+    def _acquire_sliding(self, key: Any,
+                         _now: Callable[[], int] = time.monotonic_ns) -> int | None:
         """
         Try to acquire a call slot. Returns None on success, or the
-        wait time in seconds if rate limited.
+        wait time in nanoseconds if rate limited.
+
+        `_now` is bound as a default argument so the clock is a local lookup.
         """
-        with self.lock:
-            current_time = time.time()
+        self._acquires_since_sweep += 1
+        if self._acquires_since_sweep >= _SWEEP_INTERVAL:
+            self._maybe_sweep()
 
-            if key not in self.windows:
-                self.windows[key] = deque()
+        windows = self.windows
+        calls = self.calls
+        period_ns = self._period_ns
 
-            window = self.windows[key]
+        with self._locks[hash(key) & _STRIPE_MASK]:
+            current_time = _now()
+
+            slot = windows.slots.get(key)
+            if slot is None:
+                slot = windows.slots[key] = windows.allocate()
+            buf = windows.bufs[slot]
+            capacity = len(buf)
+            head = windows.heads[slot]
+            count = windows.counts[slot]
 
             # Remove timestamps outside the current window
-            cutoff = current_time - self.period
-            while window and window[0] <= cutoff:
-                window.popleft()
+            cutoff = current_time - period_ns
+            if count and buf[head] <= cutoff:
+                expired = _count_expired(buf, head, count, capacity, cutoff)
+                count -= expired
+                head += expired
+                if head >= capacity:
+                    head -= capacity
+                windows.heads[slot] = head
+
+            if count < calls:
+                if count == capacity:
+                    buf = windows.bufs[slot] = _grow_ring(buf, head, count, calls)
+                    capacity = len(buf)
+                    head = windows.heads[slot] = 0
+                tail = head + count
+                buf[tail - capacity if tail >= capacity else tail] = current_time
+                windows.counts[slot] = count + 1
+                return None
+
+            # Rate limited (nothing was evicted, so the ring is still full):
+            # wait until the oldest call expires
+            return buf[head] + period_ns - current_time
+
+    def _acquire_sliding_global(self, key: Any = None,
+                                _now: Callable[[], int] = time.monotonic_ns) -> int | None:
+        """
+        Sliding window acquire for a global (non per-key) limit; `key` is ignored.
+        """
+        calls = self.calls
+
+        with self._global_lock:
+            current_time = _now()
+            buf = self._gbuf
+            capacity = len(buf)
+            head = self._ghead
+            count = self._gcount
+
+            cutoff = current_time - self._period_ns
+            if count and buf[head] <= cutoff:
+                expired = _count_expired(buf, head, count, capacity, cutoff)
+                count -= expired
+                head += expired
+                if head >= capacity:
+                    head -= capacity
+                self._ghead = head
+
+            if count < calls:
+                if count == capacity:
+                    buf = self._gbuf = _grow_ring(buf, head, count, calls)
+                    capacity = len(buf)
+                    head = self._ghead = 0
+                tail = head + count
+                buf[tail - capacity if tail >= capacity else tail] = current_time
+                self._gcount = count + 1
+                return None
+
+            return buf[head] + self._period_ns - current_time
+
+    def _acquire_fixed(self, key: Any,
+                       _now: Callable[[], int] = time.monotonic_ns) -> int | None:
+        """
+        Try to acquire a call slot in the key's current fixed window. Returns
+        None on success, or the wait time in nanoseconds if rate limited.
+        """
+        self._acquires_since_sweep += 1
+        if self._acquires_since_sweep >= _SWEEP_INTERVAL:
+            self._maybe_sweep()
+
+        counters = self.counters
+        period_ns = self._period_ns
+
+        with self._locks[hash(key) & _STRIPE_MASK]:
+            current_time = _now()
+            window_id = current_time // period_ns
+
+            counter = counters.get(key)
+            if counter is None:
+                counters[key] = [window_id, 1]
+                return None
+
+            # A new window resets the count; otherwise a single compare-and-increment
+            if counter[0] != window_id:
+                counter[0] = window_id
+                counter[1] = 1
+                return None
+
+            if counter[1] < self.calls:
+                counter[1] += 1
+                return None
+
+            # Rate limited: wait until the next window starts
+            return (window_id + 1) * period_ns - current_time
+
+    def _acquire_fixed_global(self, key: Any = None,
+                              _now: Callable[[], int] = time.monotonic_ns) -> int | None:
+        """
+        Fixed window acquire for a global (non per-key) limit; `key` is ignored.
+        """
+        period_ns = self._period_ns
+
+        with self._global_lock:
+            current_time = _now()
+            window_id = current_time // period_ns
+
+            if self._window_id != window_id:
+                self._window_id = window_id
+                self._window_count = 1
+                return None
 
-            if len(window) < self.calls:
-                window.append(current_time)
+            if self._window_count < self.calls:
+                self._window_count += 1
                 return None
 
-            # Rate limited: wait until the oldest call expires
-            return window[0] + self.period - current_time
+            return (window_id + 1) * period_ns - current_time
+
+    def _acquire_gcra(self, key: Any,
+                      _now: Callable[[], int] = time.monotonic_ns) -> int | None:
+        """
+        Try to acquire a call slot using GCRA. Returns None on success, or
+        the wait time in nanoseconds if rate limited.
+        """
+        self._acquires_since_sweep += 1
+        if self._acquires_since_sweep >= _SWEEP_INTERVAL:
+            self._maybe_sweep()
+
+        tats = self.tats
+        with self._locks[hash(key) & _STRIPE_MASK]:
+            current_time = _now()
+
+            # Each call pushes the theoretical arrival time forward by one
+            # emission interval; a call is allowed while the TAT is no more
+            # than `period - increment` ahead of now, which permits bursts of
+            # up to `calls`.
+            tat = tats.get(key, current_time)
+            if tat < current_time:
+                tat = current_time
+
+            wait_time = tat - self._tolerance_ns - current_time
+            if wait_time > 0:
+                return wait_time
+
+            tats[key] = tat + self._increment_ns
+            return None
+
+    def _acquire_gcra_global(self, key: Any = None,
+                             _now: Callable[[], int] = time.monotonic_ns) -> int | None:
+        """
+        GCRA acquire for a global (non per-key) limit; `key` is ignored.
+        """
+        with self._global_lock:
+            current_time = _now()
+
+            tat = self._tat
+            if tat < current_time:
+                tat = current_time
+
+            wait_time = tat - self._tolerance_ns - current_time
+            if wait_time > 0:
+                return wait_time
+
+            self._tat = tat + self._increment_ns
+            return None
 
     def __call__(self, func: Callable[..., Any]) -> Callable[..., Any]:
         """
         Decorator implementation.
+
+        The wrapper is specialized on `auto_retry` and `per_key` when
+        decorating, and the limiter's methods are bound as closure variables,
+        so each call skips the retry loop setup, the key extraction for global
+        limits, and the attribute lookups. Global limits on plain functions
+        without **kwargs or default values get a wrapper with the function's
+        exact parameters, so calls don't pack arguments into a tuple and dict.
         """
-        @functools.wraps(func)
-        def wrapper(*args: Any, **kwargs: Any) -> Any:
-            key = self._get_key(*args, **kwargs)
+        per_key = self.per_key
+        acquire = self._acquire
+        max_retries = self.max_retries
+        sleep = time.sleep
+
+        def wait_for_slot(key: Any, wait_ns: int) -> None:
+            """Sleep and re-acquire until a slot frees; raise once retries run out."""
+            # The reported wait is exactly long enough for a slot to free, so
+            # the first retry normally succeeds; further retries only happen
+            # if another caller took the slot first
+            for _ in range(max_retries):
+                sleep(wait_ns / 1e9)
+                retry_wait_ns = acquire(key)
+
+                if retry_wait_ns is None:
+                    return
+                wait_ns = retry_wait_ns
 
-            for attempt in range(self.max_retries + 1): # One initial try + retries
-                wait_time = self._try_acquire_or_wait_time(key)
+            raise RateLimitExceeded(wait_ns / 1e9)
 
-                if wait_time is None:
+        def raise_exceeded(key: Any, wait_ns: int) -> None:
+            raise RateLimitExceeded(wait_ns / 1e9)
+
+        if per_key is None:
+            on_limited = wait_for_slot if self.auto_retry else raise_exceeded
+            exact_wrapper = _exact_signature_wrapper(func, acquire, on_limited)
+            if exact_wrapper is not None:
+                return _copy_metadata(exact_wrapper, func)
+
+        if not self.auto_retry:
+            if per_key is None:
+                def wrapper(*args: Any, **kwargs: Any) -> Any:
+                    wait_ns = acquire(None)  # Global rate limit
+
+                    if wait_ns is None:
+                        return func(*args, **kwargs)
+
+                    raise RateLimitExceeded(wait_ns / 1e9)
+
+                return _copy_metadata(wrapper, func)
+
+            def keyed_wrapper(*args: Any, **kwargs: Any) -> Any:
+                wait_ns = acquire(per_key(*args, **kwargs))
+
+                if wait_ns is None:
                     return func(*args, **kwargs)
 
-                if not self.auto_retry or attempt == self.max_retries:
-                    raise RateLimitExceeded(
-                        f"Rate limit exceeded! Try again in {wait_time:.2f} seconds."
-                    )
+                raise RateLimitExceeded(wait_ns / 1e9)
+
+            return _copy_metadata(keyed_wrapper, func)
 
-                time.sleep(wait_time)
+        def retrying_wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = None if per_key is None else per_key(*args, **kwargs)
 
-        return wrapper
+            wait_ns = acquire(key)
+            if wait_ns is not None:
+                wait_for_slot(key, wait_ns)
+
+            return func(*args, **kwargs)
+
+        return _copy_metadata(retrying_wrapper, func)
 
 class RateLimitExceeded(Exception):
-    """Exception raised when rate limit is exceeded."""
-    pass
+    """
+    Exception raised when rate limit is exceeded.
+
+    `wait_time` is the number of seconds until a retry will succeed. The
+    message is only formatted when the exception is converted to a string.
+    Constructing it with a message instead (e.g. `RateLimitExceeded("...")`)
+    still works; `wait_time` is then None and the message is used as is.
+    """
+
+    def __init__(self, *args: Any):
+        super().__init__(*args)
+        self.wait_time: float | None = None
+        if len(args) == 1 and isinstance(args[0], (int, float)):
+            self.wait_time = args[0]
+
+    def __str__(self) -> str:
+        if self.wait_time is None:
+            return super().__str__()
+        return f"Rate limit exceeded! Try again in {self.wait_time:.2f} seconds."
 
 rate_limiter = RateLimiter
@@ -4,11 +4,16 @@
 Advanced tests for the rate limiter.
 """
 
+import sys
 import time
 import threading
+from collections import deque
 import pytest
 from rate_limiter_df import RateLimiter, RateLimitExceeded
 
+# The package re-exports a `rate_limiter` alias that shadows the submodule
+rate_limiter_module = sys.modules["rate_limiter_df.rate_limiter"]
+
 
 class TestSlidingWindowBehavior:
     """Verify the sliding window correctly tracks and expires calls."""
@@ -83,6 +88,63 @@ class TestSlidingWindowBehavior:
             func()
 
 
+class TestLargeWindowEviction:
+    """Drive windows larger than the bisect threshold through ring wraparound."""
+
+    PERIOD_NS = 1_000_000_000
+
+    # Call times (ns) for a 10-call window. Each phase refills the ring with
+    # more than _BISECT_THRESHOLD live timestamps, then expires part of it:
+    #   t=P+4:  unwrapped ring, timestamps 0-4 expire
+    #   t=P+7:  ring wraps; 5-7 expire from the run ending at the buffer end
+    #   t=2P+5: that run (8, 9) fully expires, and the search continues in
+    #           the wrapped-around run, expiring the P+4 timestamps
+    # The extra calls at each phase's time fill the ring and then get rejected.
+    P = PERIOD_NS
+    TIMES = (
+        list(range(10)) + [9]
+        + [P + 4] * 6
+        + [P + 7] * 4
+        + [2 * P + 5] * 8
+    )
+
+    @staticmethod
+    def _reference_waits(calls, period_ns, times):
+        window = deque()
+        waits = []
+        for now in times:
+            while window and window[0] <= now - period_ns:
+                window.popleft()
+            if len(window) < calls:
+                window.append(now)
+                waits.append(None)
+            else:
+                waits.append(window[0] + period_ns - now)
+        return waits
+
+    @pytest.mark.parametrize("per_key", [None, lambda: "k"])
+    def test_matches_deque_reference(self, per_key, monkeypatch):
+        bisects = []
+        real_bisect_right = rate_limiter_module.bisect_right
+
+        def recording_bisect_right(*args):
+            bisects.append(args)
+            return real_bisect_right(*args)
+
+        monkeypatch.setattr(rate_limiter_module, "bisect_right", recording_bisect_right)
+
+        calls = 10
+        assert calls > rate_limiter_module._BISECT_THRESHOLD
+        limiter = RateLimiter(calls=calls, period=1.0, per_key=per_key)
+        assert limiter._period_ns == self.PERIOD_NS
+
+        waits = [limiter._acquire("k", _now=lambda: now) for now in self.TIMES]
+
+        assert waits == self._reference_waits(calls, self.PERIOD_NS, self.TIMES)
+        # The large windows were trimmed by binary search
+        assert bisects
+
+
 class TestWaitTimeAccuracy:
     """Verify the reported wait time is useful and accurate."""
 
@@ -95,6 +157,24 @@ class TestWaitTimeAccuracy:
         with pytest.raises(RateLimitExceeded, match=r"Try again in \d+\.\d+ seconds"):
             func()
 
+    def test_wait_time_attribute(self):
+        @RateLimiter(calls=1, period=1.0)
+        def func():
+            pass
+
+        func()
+        with pytest.raises(RateLimitExceeded) as exc_info:
+            func()
+
+        assert 0 < exc_info.value.wait_time <= 1.0
+        assert f"{exc_info.value.wait_time:.2f} seconds" in str(exc_info.value)
+
+    def test_message_constructor_still_supported(self):
+        exc = RateLimitExceeded("custom message")
+
+        assert str(exc) == "custom message"
+        assert exc.wait_time is None
+
     def test_waiting_the_reported_time_allows_retry(self):
         """Sleeping for the reported wait time should unblock the next call."""
         import re
@@ -196,6 +276,35 @@ class TestDecoratorBehavior:
 
         assert my_function.__doc__ == "My docstring."
 
+    def test_exposes_wrapped_function(self):
+        def my_function():
+            pass
+
+        wrapped = RateLimiter(calls=1, period=1.0)(my_function)
+
+        assert wrapped.__wrapped__ is my_function
+        assert wrapped.__qualname__ == my_function.__qualname__
+        assert wrapped.__module__ == my_function.__module__
+
+    def test_preserves_type_hints(self):
+        import typing
+
+        def my_function(a: int, b: str = "x") -> int:
+            return a
+
+        wrapped = RateLimiter(calls=1, period=1.0)(my_function)
+
+        assert wrapped.__annotations__ == my_function.__annotations__
+        assert typing.get_type_hints(wrapped) == {"a": int, "b": str, "return": int}
+
+    def test_wraps_non_function_callables(self):
+        import functools
+
+        wrapped = RateLimiter(calls=1, period=1.0)(functools.partial(max, 1))
+
+        assert wrapped(2) == 2
+        assert wrapped.__wrapped__.func is max
+
     def test_passes_args_and_kwargs(self):
         @RateLimiter(calls=5, period=1.0)
         def add(a, b, extra=0):
@@ -204,6 +313,70 @@ class TestDecoratorBehavior:
         assert add(1, 2) == 3
         assert add(1, 2, extra=10) == 13
 
+    def test_passes_all_parameter_kinds(self):
+        @RateLimiter(calls=5, period=1.0)
+        def func(a, b=2, /, c=3, *args, d, e=5):
+            return (a, b, c, args, d, e)
+
+        assert func(1, d=4) == (1, 2, 3, (), 4, 5)
+        assert func(1, 9, 8, 7, 6, d=0, e=1) == (1, 9, 8, (7, 6), 0, 1)
+        with pytest.raises(TypeError):
+            func(1)
+
+    def test_passes_all_parameter_kinds_without_defaults(self):
+        @RateLimiter(calls=5, period=1.0)
+        def func(a, /, b, *args, c):
+            return (a, b, args, c)
+
+        assert func(1, 2, c=3) == (1, 2, (), 3)
+        assert func(1, 2, 3, 4, c=5) == (1, 2, (3, 4), 5)
+
+    def test_wrong_arguments_do_not_consume_a_slot(self):
+        """Global limits on functions without defaults bind arguments before acquiring."""
+        @RateLimiter(calls=1, period=1.0)
+        def func(a, *, b):
+            return (a, b)
+
+        with pytest.raises(TypeError):
+            func(1)
+        with pytest.raises(TypeError):
+            func(1, 2, b=3)
+
+        assert func(1, b=2) == (1, 2)
+        with pytest.raises(RateLimitExceeded):
+            func(1, b=2)
+
+    def test_reassigned_defaults_are_used(self):
+        def func(a=1, *, b=2):
+            return (a, b)
+
+        wrapped = RateLimiter(calls=2, period=1.0)(func)
+        func.__defaults__ = (10,)
+        func.__kwdefaults__ = {"b": 20}
+
+        assert wrapped() == (10, 20)
+
+    def test_preserves_signature(self):
+        import inspect
+
+        def func(a, b=2, *, c):
+            pass
+
+        wrapped = RateLimiter(calls=1, period=1.0)(func)
+
+        assert inspect.signature(wrapped) == inspect.signature(func)
+
+    def test_decorates_methods(self):
+        class Service:
+            @RateLimiter(calls=1, period=1.0)
+            def handle(self, value):
+                return value
+
+        service = Service()
+        assert service.handle(1) == 1
+        with pytest.raises(RateLimitExceeded):
+            service.handle(2)
+
     def test_propagates_exceptions(self):
         @RateLimiter(calls=5, period=1.0)
         def fail():
@@ -229,6 +402,17 @@ class TestDecoratorBehavior:
 class TestEdgeCases:
     """Edge cases and boundary conditions."""
 
+    @pytest.mark.parametrize("algorithm", ["sliding", "fixed", "gcra"])
+    def test_zero_calls_rejected(self, algorithm):
+        with pytest.raises(ValueError, match="calls"):
+            RateLimiter(calls=0, period=1.0, algorithm=algorithm)
+
+    @pytest.mark.parametrize("algorithm", ["sliding", "fixed", "gcra"])
+    @pytest.mark.parametrize("period", [0, -1.0, 1e-12])
+    def test_non_positive_period_rejected(self, algorithm, period):
+        with pytest.raises(ValueError, match="period"):
+            RateLimiter(calls=1, period=period, algorithm=algorithm)
+
     def test_single_call_limit(self):
         @RateLimiter(calls=1, period=0.5)
         def func():
@@ -249,6 +433,15 @@ class TestEdgeCases:
         with pytest.raises(RateLimitExceeded):
             func()
 
+    @pytest.mark.parametrize("per_key", [None, lambda: "k"])
+    def test_huge_call_limit_allocates_lazily(self, per_key):
+        @RateLimiter(calls=10**9, period=60.0, per_key=per_key)
+        def func():
+            return True
+
+        for _ in range(1000):
+            assert func() is True
+
     def test_per_key_with_none_key(self):
         """A per_key function that returns None should still work."""
         @RateLimiter(calls=1, period=1.0, per_key=lambda: None)
@@ -259,6 +452,25 @@ class TestEdgeCases:
         with pytest.raises(RateLimitExceeded):
             func()
 
+    @pytest.mark.parametrize("algorithm", ["sliding", "fixed", "gcra"])
+    def test_falsy_per_key_callable_is_used(self, algorithm):
+        """A per_key callable that is falsy (e.g. defines __len__) still keys calls."""
+        class KeyFunc:
+            def __len__(self):
+                return 0
+
+            def __call__(self, k):
+                return k
+
+        @RateLimiter(calls=1, period=1.0, per_key=KeyFunc(), algorithm=algorithm)
+        def func(k):
+            return k
+
+        assert func("a") == "a"
+        assert func("b") == "b"
+        with pytest.raises(RateLimitExceeded):
+            func("a")
+
     def test_per_key_with_varying_types(self):
         """Different key types should each get their own bucket."""
         @RateLimiter(calls=1, period=1.0, per_key=lambda k: k)
@@ -278,6 +490,70 @@ class TestEdgeCases:
             func((1, 2))
 
 
+class TestIdleKeyEviction:
+    """Verify state for keys that have gone idle is eventually dropped."""
+
+    @pytest.mark.parametrize("algorithm", ["sliding", "fixed", "gcra"])
+    def test_expired_keys_are_evicted(self, algorithm):
+        limiter = RateLimiter(calls=1, period=5.0, per_key=lambda k: k, algorithm=algorithm)
+        limiter._last_sweep = 2**62  # only sweep explicitly
+        states = {
+            "sliding": limiter.windows.slots,
+            "fixed": limiter.counters,
+            "gcra": limiter.tats,
+        }[algorithm]
+        period_ns = limiter._period_ns
+
+        for k in range(1024):
+            assert limiter._acquire(("old", k), _now=lambda: 0) is None
+
+        # Two periods later the old keys are idle under every algorithm
+        later = 2 * period_ns
+        for k in range(1024):
+            assert limiter._acquire(("new", k), _now=lambda: later) is None
+
+        limiter._sweep(later)
+
+        assert not any(key[0] == "old" for key in states)
+        assert len(states) == 1024
+
+    def test_active_keys_are_kept(self):
+        limiter = RateLimiter(calls=1, period=5.0, per_key=lambda k: k)
+
+        @limiter
+        def func(k):
+            return k
+
+        func("active")
+        limiter._last_sweep -= limiter._period_ns  # make a sweep due
+        for k in range(1024):
+            func(k)
+
+        assert "active" in limiter.windows.slots
+        with pytest.raises(RateLimitExceeded):
+            func("active")
+
+    def test_rings_grow_on_demand_and_table_compacts(self):
+        limiter = RateLimiter(calls=1000, period=5.0, per_key=lambda k: k)
+        limiter._last_sweep = 2**62  # only sweep explicitly
+        windows = limiter.windows
+
+        for k in range(200):
+            limiter._acquire(k, _now=lambda: 0)
+        for _ in range(10):
+            limiter._acquire("busy", _now=lambda: 1)
+
+        # Keys that made one call don't reserve room for `calls` timestamps
+        assert len(windows.bufs[windows.slots[0]]) < 10
+        assert len(windows.bufs[windows.slots["busy"]]) < 1000
+
+        # Evicting the idle keys frees most slots, so the table is shrunk
+        limiter._sweep(limiter._period_ns)
+        assert list(windows.slots) == ["busy"]
+        assert len(windows.bufs) == 1
+        assert windows.counts[windows.slots["busy"]] == 10
+
+
 class TestAutoRetry:
     """Verify auto-retry behavior."""
 
@@ -329,5 +605,133 @@ class TestAutoRetry:
         assert func() == "hello"
 
 
+class TestFixedWindow:
+    """Verify the fixed window algorithm option."""
+
+    def test_allows_up_to_limit_per_window(self):
+        @RateLimiter(calls=3, period=1.0, algorithm="fixed")
+        def func():
+            return True
+
+        for _ in range(3):
+            func()
+
+        with pytest.raises(RateLimitExceeded):
+            func()
+
+    def test_next_window_resets_count(self):
+        @RateLimiter(calls=2, period=0.2, algorithm="fixed")
+        def func():
+            return True
+
+        func()
+        func()
+        with pytest.raises(RateLimitExceeded):
+            func()
+
+        time.sleep(0.25)
+        func()
+        func()
+
+    def test_wait_time_is_until_next_window(self):
+        @RateLimiter(calls=1, period=1.0, algorithm="fixed")
+        def func():
+            pass
+
+        func()
+        with pytest.raises(RateLimitExceeded) as exc_info:
+            func()
+
+        # The first call may have landed anywhere in its window
+        assert 0 < exc_info.value.wait_time <= 1.0
+
+    def test_per_key_isolation(self):
+        @RateLimiter(calls=1, period=1.0, per_key=lambda k: k, algorithm="fixed")
+        def func(k):
+            return k
+
+        assert func("a") == "a"
+        assert func("b") == "b"
+        with pytest.raises(RateLimitExceeded):
+            func("a")
+
+
+class TestGCRA:
+    """Verify the GCRA algorithm option."""
+
+    def test_allows_burst_up_to_limit(self):
+        @RateLimiter(calls=5, period=1.0, algorithm="gcra")
+        def func():
+            return True
+
+        for _ in range(5):
+            func()
+
+        with pytest.raises(RateLimitExceeded):
+            func()
+
+    def test_slots_free_one_interval_at_a_time(self):
+        """After a burst, one slot reopens every period / calls seconds."""
+        @RateLimiter(calls=2, period=0.5, algorithm="gcra")
+        def func():
+            return True
+
+        func()
+        func()
+
+        # One emission interval (0.25s) frees exactly one slot
+        time.sleep(0.3)
+        func()
+        with pytest.raises(RateLimitExceeded):
+            func()
+
+    def test_wait_time_is_reported(self):
+        @RateLimiter(calls=1, period=1.0, algorithm="gcra")
+        def func():
+            pass
+
+        func()
+        with pytest.raises(RateLimitExceeded, match=r"Try again in \d+\.\d+ seconds"):
+            func()
+
+    def test_per_key_isolation(self):
+        @RateLimiter(calls=1, period=1.0, per_key=lambda k: k, algorithm="gcra")
+        def func(k):
+            return k
+
+        assert func("a") == "a"
+        assert func("b") == "b"
+        with pytest.raises(RateLimitExceeded):
+            func("a")
+
+    def test_concurrent_global_calls_respect_limit(self):
+        successes = []
+        lock = threading.Lock()
+
+        @RateLimiter(calls=5, period=2.0, algorithm="gcra")
+        def func():
+            return True
+
+        def worker():
+            try:
+                func()
+                with lock:
+                    successes.append(1)
+            except RateLimitExceeded:
+                pass
+
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(successes) == 5
+
+    def test_unknown_algorithm_rejected(self):
+        with pytest.raises(ValueError):
+            RateLimiter(calls=1, period=1.0, algorithm="bogus")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])